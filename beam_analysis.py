@@ -122,4 +122,58 @@ def beam_load_analysis(P_DL:float, P_LL:float, l:float, a:float, h:float, b:floa
         deep_beam = False 
         load_results = {'Pu': Pu_bb, 'Beam_Poly': beam_poly, 'Deep Beam': deep_beam, 'Shear Diagram': shear_fig_bb, 'Moment Diagram': moment_fig_bb, 'Vu': Vu_bb, 'Mu':Mu_bb}
 
-    return load_results
\ No newline at end of file
+    return load_results
+
+
+def factored_point_load(P_DL, P_LL, l, h, b, col1=24.0, col2=24.0, area=None):
+    """
+    Returns factored point load Pu (kip) including beam self weight over the span plus half of
+    each support column, same as beam_load_analysis and deep_transfer_calc. Every argument may
+    be a scalar or a numpy array. area is the section area (in^2) for non rectangular sections,
+    see section_geometry, h*b when None.
+    """
+    if area is None:
+        sw = 150*(h/12)*(b/12)*(l+col1/24 + col2/24)/1000  # Calculates self weight of beam
+    else:
+        sw = 150*(area/144)*(l+col1/24 + col2/24)/1000
+    P_DL_total = P_DL + sw
+    return np.maximum(1.2*P_DL_total+1.6*P_LL, 1.4*P_DL_total)
+
+
+def max_shear_strength(fc, b, h, d=None):
+    """
+    Returns Phi_Vn_Max (kip), the maximum shear strength of a deep beam per ACI 318-14 Eq. 9.9.2.1,
+    b is the web width and d the effective depth, 0.9h as in the app when None. Every argument may
+    be a scalar or a numpy array.
+    """
+    if d is None:
+        d = .9*h
+    return (.75*10*np.sqrt(fc)*b*d)/1000
+
+
+def beam_load_analysis_batch(P_DL, P_LL, l, a, h, b, col1=24.0, col2=24.0, area=None):
+    """
+    Vectorized version of beam_load_analysis without the plotly figures, every argument 
+    may be a scalar or a numpy array. area is the section area (in^2) used for self weight,
+    h*b when None.
+
+    Returns dictionary of numpy arrays, 'Pu', 'Deep Beam', 'R1', 'R2' for the deep beam case and 
+    'Pu_bb', 'Vu', 'Mu' for the bernoulli beam case, calculated the same way as beam_load_analysis
+    """
+    P_DL, P_LL, l, a, h, b, col1, col2 = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (P_DL, P_LL, l, a, h, b, col1, col2)])
+
+    Pu = factored_point_load(P_DL, P_LL, l, h, b, col1, col2, area)
+    Pu_bb = np.maximum(1.2*P_DL+1.6*P_LL, 1.4*P_DL)
+
+    # Deep Beam Reactions 
+    b1 = l-a
+    r1 = (Pu*b1)/l
+    r2 = (Pu*a)/l
+
+    # Bernoulli Beam 
+    sw_line = 150*(h/12)*(b/12)/1000 if area is None else 150*(np.asarray(area, dtype=float)/144)/1000
+    Vu_bb = np.maximum(r1, r2)
+    Mu_bb = Pu*a*b/(l) + (sw_line*l**2)/8
+
+    return {'Pu': Pu, 'Deep Beam': (l*12)/h <= 4, 'R1': r1, 'R2': r2, 'Pu_bb': Pu_bb, 'Vu': Vu_bb, 'Mu': Mu_bb}
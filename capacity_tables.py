@@ -0,0 +1,132 @@
+# IMPORTS
+import os
+import numpy as np
+from beam_analysis import factored_point_load, max_shear_strength
+from deep_transfer_app import deep_transfer_calc_batch
+
+
+# Default location of the precomputed table, built on first use by the app
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'capacity_table.npy')
+
+# Surfaces stored in the table, in order along the first axis
+SURFACES = ('phi_vn_ratio', 'tie_ratio', 'alpha_1', 'alpha_2')
+
+# Default grid ranges [start, stop, number of points]
+#   l: Beam Length (ft)
+#   a/l: location of point load as a fraction of the span
+#   h/l: Beam Height over span, both in inches - deep beams per ACI 318-14 9.9.1.1 are >= 0.25
+DEFAULT_AXES = np.array([[4.0, 40.0, 73],
+                         [0.05, 0.95, 91],
+                         [0.25, 1.0, 76]])
+
+
+# Accuracy of quick_capacity_check on DEFAULT_AXES against deep_transfer_calc_batch for inputs inside
+# the grid, see verification.verify_capacity_table. Largest relative errors are for loads next to a
+# support on short spans, tie counts can differ by one where A_s_req is close to a whole bar.
+TABLE_RTOL = 0.02
+
+
+def _axis_values(axes):
+    return [np.linspace(start, stop, int(num)) for start, stop, num in axes]
+
+
+def build_capacity_table(path=TABLE_PATH, axes=DEFAULT_AXES):
+    """
+    Precomputes normalized strut and tie surfaces from deep_transfer_calc_batch on a dense
+    grid of l, a/l and h/l and writes them to a binary .npy file (plus a small axes file).
+
+    The STM capacity and tie force are both proportional to Pu, and fc and b cancel out of
+    the node capacities, so the surfaces are stored per kip of Pu:
+        phi_vn_ratio = Phi-Vn/Pu
+        tie_ratio = A_s_req*fy/Pu  (in^2*ksi per kip)
+    The strut angles alpha_1 and alpha_2 (radians) are purely geometric.
+
+    Returns the table as loaded by load_capacity_table
+    """
+    l_axis, a_axis, h_axis = _axis_values(axes)
+    l, a_l, h_l = np.meshgrid(l_axis, a_axis, h_axis, indexing='ij')
+
+    # Any load works since every surface is divided by Pu
+    res = deep_transfer_calc_batch(P_DL=1.0, P_LL=0.0, l=l, a=a_l*l, h=h_l*l*12, b=1.0, fc=4000, fy=1.0,
+                                   col1=0.0, col2=0.0)
+    Pu = res['Pu']
+
+    table = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(len(SURFACES),) + l.shape)
+    table[0] = res['Phi-Vn']/Pu
+    table[1] = res['A_s_req']/Pu
+    table[2] = res['alpha_1']
+    table[3] = res['alpha_2']
+    table.flush()
+    del table
+
+    np.save(_axes_path(path), np.asarray(axes, dtype=float))
+    return load_capacity_table(path)
+
+
+def _axes_path(path):
+    root, ext = os.path.splitext(path)
+    return root + '_axes' + ext
+
+
+def load_capacity_table(path=TABLE_PATH):
+    """
+    Memory maps a table written by build_capacity_table, returns dictionary with the
+    'Surfaces' array and the grid 'Axes'
+    """
+    return {'Surfaces': np.load(path, mmap_mode='r'), 'Axes': np.load(_axes_path(path))}
+
+
+def multilinear_interp(values, axes, points):
+    """
+    Multilinear interpolation on a uniform grid.
+
+    values: array of shape (n_surfaces, n1, n2, ..., nk)
+    axes: array of [start, stop, num] rows, one per grid dimension
+    points: array of shape (n_points, k), points outside the grid are clamped to the boundary
+
+    Returns array of shape (n_surfaces, n_points)
+    """
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    starts, stops, nums = axes[:, 0], axes[:, 1], axes[:, 2].astype(int)
+    pos = (points - starts)/(stops - starts)*(nums - 1)
+    pos = np.clip(pos, 0, nums - 1)
+    idx = np.minimum(pos.astype(int), nums - 2)
+    frac = pos - idx
+
+    result = 0
+    ndim = len(nums)
+    for corner in range(2**ndim):
+        bits = [(corner >> k) & 1 for k in range(ndim)]
+        weight = np.prod([frac[:, k] if bit else 1 - frac[:, k] for k, bit in enumerate(bits)], axis=0)
+        result = result + weight*values[(slice(None),) + tuple(idx[:, k] + bit for k, bit in enumerate(bits))]
+    return result
+
+
+def quick_capacity_check(table, P_DL, P_LL, l, a, h, b, fc=4000, fy=60, tie_size=8, col1=24.0, col2=24.0):
+    """
+    Approximate deep beam check from the precomputed table, intended for instant UI feedback
+    while inputs change. The exact deep_transfer_calc should be run once inputs are final.
+
+    Returns dictionary of 'Phi-Vn' (lb, like deep_transfer_calc), 'Phi-Vn (kip)', 'Vu' (kip), 'Number of ties',
+    'alpha_1', 'alpha_2', 'Phi_Vn_Max' (ACI 318-14 Eq. 9.9.2.1), the margins the full design checks,
+    'Shear Margin' (Phi_Vn_Max/Vu - 1) and 'Alpha Margin' (smallest strut angle less 25 degrees), and
+    'In Table' (False if the inputs were clamped to the edge of the grid)
+    """
+    l, a, h = np.atleast_1d(l).astype(float), np.atleast_1d(a).astype(float), np.atleast_1d(h).astype(float)
+    points = np.stack(np.broadcast_arrays(l, a/l, h/(12*l)), axis=-1)
+    surfaces = multilinear_interp(table['Surfaces'], table['Axes'], points)
+
+    axes = table['Axes']
+    in_table = np.all((points >= axes[:, 0]) & (points <= axes[:, 1]), axis=-1)
+
+    Pu = factored_point_load(P_DL, P_LL, l, h, b, col1, col2)
+    Vu = Pu*np.maximum(l-a, a)/l
+    phi_Vn = surfaces[0]*Pu
+    A_s_req = surfaces[1]*Pu/fy
+    tie_area = ((np.asarray(tie_size)/8)**2)*np.pi/4
+
+    Phi_Vn_Max = max_shear_strength(fc, b, h)
+
+    return {'Phi-Vn': phi_Vn, 'Phi-Vn (kip)': phi_Vn/1000, 'Vu': Vu, 'Number of ties': np.ceil(A_s_req/tie_area),
+            'alpha_1': surfaces[2], 'alpha_2': surfaces[3], 'Phi_Vn_Max': Phi_Vn_Max, 'Shear Margin': Phi_Vn_Max/Vu - 1,
+            'Alpha Margin': np.degrees(np.minimum(surfaces[2], surfaces[3])) - 25, 'In Table': in_table}
@@ -4,22 +4,161 @@ import plotly.graph_objects as go
 import streamlit as st
 from deep_transfer_app import deep_transfer_calc
 import numpy as np
-from beam_analysis import beam_load_analysis
+from beam_analysis import beam_load_analysis, max_shear_strength
 from rc_beam_design import rc_beam_design
+from input_validation import INVALID_GEOMETRY, STM_UNAVAILABLE, STATUS_MESSAGES, describe_status, validate_inputs, deep_transfer_calc_checked
+from capacity_tables import TABLE_PATH, build_capacity_table, load_capacity_table, quick_capacity_check
+from floor_transfer import floor_transfer_analysis
+from load_takedown import column_takedown, floor_load_table, transfer_forces
+from sensitivity import SENSITIVITY_OUTPUTS, stm_sensitivity, tornado_chart
+from result_store import open_result_store, read_manifest
+from schedule_overview import beam_utilization, hidden_beams, overview_figure
+from design_alternatives import ALTERNATIVE_INPUTS, compare_alternatives, design_executor
 import math
+import os
+import pandas as pd
 
 # Streamlit UI 
 
 st.markdown('# RC Transfer Beam Design')
+app_mode = st.sidebar.radio('Mode', options=['Single Beam', 'Compare Alternatives', 'Sensitivity', 'Transfer Level', 'Sweep Results'])
 concrete_strengths = [4000, 5000, 6000, 7000]
 yield_strengths = [60, 70, 80]
 st.sidebar.subheader("Material Properties")
 concrete_strength = st.sidebar.selectbox('Concrete Compressive Strength (psi)', options=concrete_strengths)
 yield_strength = st.sidebar.selectbox('Reinforcement Yield Strength (ksi)', options=yield_strengths)
 
+
+#_______________________________Transfer Level Mode __________________________________#
+
+# Columns above and girders below are uploaded as CSV layouts, every girder is designed in one batch 
+if app_mode == 'Transfer Level': 
+    st.markdown('## Transfer Level Analysis')
+    st.markdown('Columns CSV: x, y (ft), P_DL, P_LL (kip), optional k_ll')
+    st.markdown('Girders CSV: x1, y1, x2, y2 (ft), h, b (in), optional fc (psi), fy (ksi), tie_size, col1, col2 (in)')
+    st.markdown('Optional Floor Loads CSV: column (row of the columns CSV), floor (0 = top), trib_area (ft^2), dead_load, '
+                'live_load (psf), optional column_weight (kip) - replaces P_DL and P_LL with a load takedown of every column')
+    column_file = st.file_uploader('Columns Above', type='csv')
+    girder_file = st.file_uploader('Girders Below', type='csv')
+    floor_file = st.file_uploader('Floor Loads Above', type='csv')
+    tolerance_stream = st.sidebar.number_input('Column to Girder Tolerance (ft)', value=0.5)
+    if column_file is None or girder_file is None: 
+        st.stop()
+
+    columns_df = pd.read_csv(column_file)
+
+    # Every column is taken down through the floors above in one pass 
+    if floor_file is not None: 
+        floor_df = pd.read_csv(floor_file)
+        floor_loads = floor_load_table(floor_df['column'].to_numpy(), floor_df['floor'].to_numpy(), len(columns_df),
+                                       floor_df['trib_area'].to_numpy(), floor_df['dead_load'].to_numpy(),
+                                       floor_df['live_load'].to_numpy(),
+                                       floor_df['column_weight'].to_numpy() if 'column_weight' in floor_df else 0.0)
+        roof_stream = st.sidebar.checkbox('Floor 0 is the roof', value=True)
+        level_forces = transfer_forces(column_takedown(**floor_loads, k_ll=columns_df.get('k_ll', 4), roof=roof_stream))
+        columns_df['P_DL'], columns_df['P_LL'] = level_forces['P_DL'], level_forces['P_LL']
+    girders_df = pd.read_csv(girder_file)
+    girder_inputs = {key: girders_df[key].to_numpy() for key in girders_df.columns}
+    girder_inputs.setdefault('fc', concrete_strength)
+    girder_inputs.setdefault('fy', yield_strength)
+    level_results = floor_transfer_analysis({key: columns_df[key].to_numpy() for key in columns_df.columns},
+                                            girder_inputs, tolerance=tolerance_stream)
+
+    unassigned = int(((level_results['Column Girder'] < 0) & ~level_results['Column At Support']).sum())
+    if unassigned: 
+        st.markdown(f'{unassigned} column(s) do not land on a girder within the tolerance')
+    supported = int(level_results['Column At Support'].sum())
+    if supported: 
+        st.markdown(f'{supported} column(s) stand over girder supports and are carried by the supports, not the girders')
+    level_df = pd.DataFrame({key: value for key, value in level_results.items() if key not in ('Column Girder', 'Column At Support')})
+    level_df['Status'] = [', '.join(describe_status(code)) or 'OK' for code in level_results['Status']]
+
+    # Overview of every girder, detailed figures only for the selected girder 
+    utilization = beam_utilization(level_results)
+    x_key = st.sidebar.selectbox('Overview x-axis', options=['Utilization', 'Max Shear Ratio', 'Node Zone Ratio'])
+    y_key = st.sidebar.selectbox('Overview y-axis', options=['Number of ties', 'Max Shear Ratio', 'Alpha Margin'])
+    overview_event = st.plotly_chart(overview_figure(utilization, x_key=x_key, y_key=y_key), on_select='rerun',
+                                     selection_mode='points', key='level_overview')
+    hidden = hidden_beams(utilization, x_key, y_key)
+    if len(hidden): 
+        with st.expander(f'{len(hidden)} girder(s) not plotted, no load or no {y_key} for bernoulli beams'): 
+            st.dataframe(level_df.iloc[hidden])
+    st.dataframe(level_df)
+
+    selected_points = overview_event.selection.points if overview_event else []
+    if selected_points: 
+        i = int(selected_points[0]['customdata'][0])
+        girder = {key: np.broadcast_to(value, len(level_df))[i] for key, value in girder_inputs.items()}
+        st.markdown(f'### Girder {i}')
+        st.markdown(', '.join(describe_status(level_results['Status'][i])) or 'OK')
+        detail_loads = beam_load_analysis(P_DL=level_results['P_DL'][i], P_LL=level_results['P_LL'][i], l=level_results['l'][i],
+                                          a=level_results['a'][i], h=girder['h'], b=girder['b'],
+                                          col1=girder.get('col1', 24.0), col2=girder.get('col2', 24.0))
+        st.plotly_chart(detail_loads['Shear Diagram'])
+        st.plotly_chart(detail_loads['Moment Diagram'])
+        if level_results['Deep Beam'][i] and not level_results['Status'][i] & STM_UNAVAILABLE: 
+            detail_design = deep_transfer_calc(P_DL=level_results['P_DL'][i], P_LL=level_results['P_LL'][i], l=level_results['l'][i],
+                                               a=level_results['a'][i], h=girder['h'], b=girder['b'], fc=girder['fc'],
+                                               fy=girder['fy'], tie_size=int(girder.get('tie_size', 8)),
+                                               col1=girder.get('col1', 24.0), col2=girder.get('col2', 24.0))
+            st.plotly_chart(detail_design['Strut and Tie Model'])
+            st.plotly_chart(detail_design['Reinforcement Diagram'])
+    st.stop()
+
+#_______________________________Sweep Results Mode __________________________________#
+
+# Results of a sweep_to_store run are read through memory maps, only the plotted columns are loaded 
+if app_mode == 'Sweep Results': 
+    st.markdown('## Sweep Results')
+    store_path = st.text_input('Result Store Directory')
+    if not store_path or read_manifest(store_path) is None: 
+        st.markdown('Enter the directory of a result store written by sweep_to_store')
+        st.stop()
+
+    store = open_result_store(store_path)
+    completed = store.pop('Completed Rows')
+    st.markdown(f'{int(completed.sum())} of {len(completed)} rows completed')
+    numeric_keys = [key for key, value in store.items() if value.dtype.kind in 'fiub']
+    x_key = st.sidebar.selectbox('x-axis', options=numeric_keys)
+    y_key = st.sidebar.selectbox('y-axis', options=numeric_keys, index=min(1, len(numeric_keys) - 1))
+    color_key = st.sidebar.selectbox('Color', options=numeric_keys)
+    rows = completed.copy()
+    if 'Status' in store and st.sidebar.toggle('Only rows without status flags'): 
+        rows &= store['Status'] == 0
+
+    # Rows of incomplete chunks or filtered out are plotted as missing 
+    plotted = {key: np.where(rows, store[key], np.nan) for key in {x_key, y_key, color_key}}
+    sweep_event = st.plotly_chart(overview_figure(plotted, x_key=x_key, y_key=y_key, color_key=color_key, title='Sweep Results'),
+                                  on_select='rerun', selection_mode='points', key='sweep_overview')
+    selected_points = sweep_event.selection.points if sweep_event else []
+    if selected_points: 
+        i = int(selected_points[0]['customdata'][0])
+        st.dataframe(pd.DataFrame({key: [value[i]] for key, value in store.items()}))
+    st.stop()
+
 st.sidebar.subheader("Transfer Forces")
 P_DL_stream = st.sidebar.number_input("Dead Load Transfer Force (kip)")
 P_LL_stream = st.sidebar.number_input("Live Load Transfer Force (kip)")
+takedown_mode = st.sidebar.toggle("Use Column Load Takedown")
+
+# Transfer forces built from the floors above, overrides the hand entered totals 
+if takedown_mode: 
+    with st.expander('Column Load Takedown', expanded=True): 
+        st.markdown('One row per floor above the transfer level, top first. Floor live loads are reduced per ASCE 7-16 4.7, '
+                    'roof live load is carried unreduced (ASCE 7-16 4.8 is not applied)')
+        roof_stream = st.checkbox('First row is the roof', value=True)
+        floors_df = st.data_editor(pd.DataFrame({'Tributary Area (ft^2)': [900.0]*4, 'Superimposed Dead Load (psf)': [20.0]*4,
+                                                 'Live Load (psf)': [50.0]*4, 'Column Self Weight (kip)': [2.0]*4}),
+                                   num_rows='dynamic')
+        k_ll_stream = st.selectbox('Live Load Element Factor K_LL', options=[4, 2])
+        floors_df = floors_df.dropna()
+        if len(floors_df): 
+            takedown = column_takedown(floors_df['Tributary Area (ft^2)'].to_numpy(), floors_df['Superimposed Dead Load (psf)'].to_numpy(),
+                                       floors_df['Live Load (psf)'].to_numpy(), floors_df['Column Self Weight (kip)'].to_numpy(),
+                                       k_ll=k_ll_stream, roof=roof_stream)
+            P_DL_stream, P_LL_stream = (float(value) for value in transfer_forces(takedown).values())
+            st.markdown(f'Dead Load Transfer Force = {P_DL_stream:.1f} kip, Live Load Transfer Force = {P_LL_stream:.1f} kip '
+                        f'(Live Load Reduction = {takedown["LL Reduction"][-1]:.2f})')
 
 st.sidebar.subheader("Transfer Beam Geometry")
 l_stream = st.sidebar.number_input("Beam Length (ft)")
@@ -41,6 +180,80 @@ stirrup_legs_stream = st.sidebar.selectbox("Number of Stirrup Legs", options=leg
 skin_bar_sizes = [4,5,6,7,8]
 skin_bar_size_stream = st.sidebar.selectbox("Skin Bar Size", options=skin_bar_sizes)
 
+st.sidebar.subheader("Quick Check")
+quick_mode = st.sidebar.toggle("Quick Check Mode (precomputed tables)")
+
+
+#_______________________________Sensitivity Mode __________________________________#
+
+# Every input is perturbed in one batched strut and tie evaluation 
+if app_mode == 'Sensitivity': 
+    st.markdown('## Strut and Tie Sensitivity')
+    rel_step_stream = st.sidebar.number_input('Perturbation (%)', value=5.0)/100
+    sensitivity_inputs = {'P_DL': P_DL_stream, 'P_LL': P_LL_stream, 'l': l_stream, 'a': a_stream, 'h': h_stream, 'b': b_stream,
+                          'fc': concrete_strength, 'fy': yield_strength, 'col1': c1_stream, 'col2': c2_stream,
+                          'cover': st.sidebar.number_input('Cover to Tie Centroid (in)', value=5.0)}
+    if validate_inputs(P_DL_stream, P_LL_stream, l_stream, a_stream, h_stream, b_stream) & INVALID_GEOMETRY: 
+        st.header('Confirm all inputs are valid')
+        st.stop()
+
+    sensitivity = stm_sensitivity(sensitivity_inputs, rel_step=rel_step_stream, tie_size=tie_size_stream)
+    st.markdown('Normalized sensitivity (% change in output per % change in input), tie demand is shown through the required tie area A_s_req')
+    st.dataframe(pd.DataFrame({output: sensitivity['Sensitivity'][output] for output in SENSITIVITY_OUTPUTS if output != 'Number of ties'},
+                              index=sensitivity['Inputs']))
+    for output in SENSITIVITY_OUTPUTS: 
+        st.plotly_chart(tornado_chart(sensitivity, output))
+    st.stop()
+
+
+#_______________________________Compare Alternatives Mode __________________________________#
+
+# Worker pool shared across reruns so alternatives don't pay the process start up each time, None on a single CPU 
+@st.cache_resource(on_release=lambda executor: executor and executor.shutdown(cancel_futures=True))
+def get_design_executor():
+    return design_executor()
+
+
+# Each row is an alternative, starting from the sidebar inputs. Loads and span are shared by every alternative 
+if app_mode == 'Compare Alternatives': 
+    st.markdown('## Compare Design Alternatives')
+    base_alternative = {'h': h_stream, 'b': b_stream, 'fc': concrete_strength, 'fy': yield_strength,
+                        'tie_size': tie_size_stream, 'stirrup_size': stirrup_size_stream, 'skin_size': skin_bar_size_stream,
+                        'stirrup_legs': stirrup_legs_stream, 'a': a_stream, 'col1': c1_stream, 'col2': c2_stream}
+    alternatives_df = st.data_editor(pd.DataFrame([base_alternative]*2, columns=ALTERNATIVE_INPUTS), num_rows='dynamic')
+    if not st.button('Compare'): 
+        st.stop()
+
+    alternatives = [{key: value for key, value in row.items() if pd.notna(value)}
+                    for row in alternatives_df.to_dict('records')]
+    for alternative in alternatives: 
+        for key in ('fc', 'tie_size', 'stirrup_size', 'skin_size', 'stirrup_legs'): 
+            if key in alternative: 
+                alternative[key] = int(alternative[key])
+    base_inputs = {'P_DL': P_DL_stream, 'P_LL': P_LL_stream, 'l': l_stream}
+
+    # Results stream into the table as each alternative finishes 
+    table_placeholder = st.empty()
+    comparison_rows = {}
+    figures = {}
+    for i, alternative_results in compare_alternatives(base_inputs, alternatives, executor=get_design_executor()): 
+        figures[i] = alternative_results.pop('Figures')
+        comparison_rows[i] = alternative_results
+        comparison = pd.DataFrame.from_dict(comparison_rows, orient='index').sort_index()
+        comparison.index.name = 'Alternative'
+        table_placeholder.dataframe(comparison)
+
+    # Overlaid diagrams, one trace per alternative 
+    for diagram in ('Shear Diagram', 'Moment Diagram'): 
+        overlay = go.Figure()
+        for i in sorted(figures): 
+            if diagram in figures[i]: 
+                trace = figures[i][diagram].data[0]
+                overlay.add_trace(go.Scatter(x=trace.x, y=trace.y, mode=trace.mode, name=f'Alternative {i}'))
+        overlay.update_layout(title=diagram, xaxis_title='Position - x')
+        st.plotly_chart(overlay)
+    st.stop()
+
 
 # Function to plot beam model from shapely polygon - defined in beam analysis function
 def create_plot(polygon, l):
@@ -109,18 +322,63 @@ def create_plot(polygon, l):
             ),
         )
         return fig  
+
+
+# Load precomputed capacity table once per server, building it on first use 
+@st.cache_resource
+def get_capacity_table():
+    if not os.path.exists(TABLE_PATH):
+        return build_capacity_table(TABLE_PATH)
+    return load_capacity_table(TABLE_PATH)
+
+
+#_______________________________Quick Check Mode __________________________________#
+
+# Interpolates the precomputed STM surfaces as inputs change, the exact design only runs on commit 
+if quick_mode: 
+    if l_stream > 0 and 0 < a_stream < l_stream and h_stream > 0 and b_stream > 0: 
+        quick = quick_capacity_check(get_capacity_table(), P_DL=P_DL_stream, P_LL=P_LL_stream, l=l_stream, a=a_stream,
+                                     h=h_stream, b=b_stream, fc=concrete_strength, fy=yield_strength,
+                                     tie_size=tie_size_stream, col1=c1_stream, col2=c2_stream)
+        st.subheader('Quick Check (interpolated)')
+        if (l_stream*12)/h_stream > 4: 
+            st.markdown('Based on given geometry, this is not considered a deep beam per ACI 318-14 9.9.1.1, run the full design for Bernoulli Theory')
+        else: 
+            col_a, col_b, col_c = st.columns(3)
+            col_a.metric('Shear Margin (Phi_Vn_Max/Vu)', f"{100*quick['Shear Margin'][0]:.1f}%")
+            col_b.metric('Strut Angle Margin (approx.)', f"{quick['Alpha Margin'][0]:.1f} deg")
+            col_c.metric('Number of ties (approx.)', f"{int(quick['Number of ties'][0])}")
+            if quick['Alpha Margin'][0] < 0: 
+                st.markdown('A strut angle is less than 25 degrees, revise beam geometry')
+            if quick['Vu'][0] > quick['Phi_Vn_Max'][0]: 
+                st.markdown("Beam exceeds maximum shear strength per ACI 318-14 Eq. 9.9.2.1")
+            if not quick['In Table'][0]: 
+                st.markdown('Inputs are outside the precomputed table range, values are clamped - run the full design')
+    else: 
+        st.header('Confirm all inputs are valid')
+    if not st.sidebar.button('Run Full Design'): 
+        st.stop()
+
 tab1, tab2, tab3 = st.tabs(["Beam Analysis", "Strut and Tie Design", "Bernoulli Beam Design"])
 
 
 
+# Validate inputs up front, invalid or missing geometry stops the app before any analysis 
+input_status = int(validate_inputs(P_DL=P_DL_stream, P_LL=P_LL_stream, l=l_stream, a=a_stream, h=h_stream, b=b_stream,
+                                   fc=concrete_strength, fy=yield_strength, tie_size=tie_size_stream,
+                                   col1=c1_stream, col2=c2_stream))
+if input_status & INVALID_GEOMETRY: 
+     st.header('Confirm all inputs are valid')
+     st.markdown(STATUS_MESSAGES[INVALID_GEOMETRY])
+     st.stop()
+
 # Run Beam Load Analysis Function to get Load Diagrams and Beam Model 
 
 try: results = beam_load_analysis(P_DL=P_DL_stream, P_LL=P_LL_stream,l=l_stream,a=a_stream,h=h_stream,
                    b=b_stream,col1=c1_stream,col2=c2_stream)
 except ZeroDivisionError: 
      st.header('Confirm all inputs are valid')
-d = .9*h_stream
-Phi_Vn_Max = (.75*10*math.sqrt(concrete_strength)*b_stream*d)/1000 # kips
+Phi_Vn_Max = max_shear_strength(concrete_strength, b_stream, h_stream) # kips
 
 #_______________________________Plot Analysis Figures __________________________________#
 
@@ -147,6 +405,14 @@ if results["Deep Beam"] == True:
     if max(results['R1'], results['R2'])> Phi_Vn_Max:
          st.markdown("Beam exceeds maximum shear strength per ACI 318-14 Eq. 9.9.2.1")
 
+    # Node C geometry can be degenerate and shallow beams have no room for the model, check with the batch path before plotting 
+    design_status = int(deep_transfer_calc_checked(P_DL=P_DL_stream, P_LL=P_LL_stream, l=l_stream, a=a_stream, h=h_stream,
+                                                   b=b_stream, fc=concrete_strength, fy=yield_strength, tie_size=tie_size_stream,
+                                                   col1=c1_stream, col2=c2_stream)['Status'])
+    if design_status & STM_UNAVAILABLE: 
+         st.subheader(', '.join(describe_status(design_status & STM_UNAVAILABLE)))
+         st.stop()
+
     try: 
 
         design_results = deep_transfer_calc(P_DL=P_DL_stream, P_LL=P_LL_stream,l=l_stream,a=a_stream,h=h_stream,
@@ -3,7 +3,7 @@ import math
 import plotly.express as px 
 import plotly.graph_objects as go 
 from shapely import (Point, LineString, Polygon, LinearRing, MultiPoint, MultiLineString, MultiPolygon, GeometryCollection)
-from beam_analysis import beam_load_analysis
+from beam_analysis import beam_load_analysis, factored_point_load
 import numpy as np
 
 
@@ -463,4 +463,89 @@ def deep_transfer_calc(P_DL:float, P_LL:float, l:float, a:float, h=40, b=20, fc=
                     'alpha_1':strut_1_alpha, 'alpha_2':strut_2_alpha, 'Node A Figure': node_a_fig, 'Node B Figure': node_b_fig,
                     'Node C Figure': node_c_fig, 'Reinforcement Diagram': reinf_fig, 'Test Fig':test_fig}
 
-    return results_dict
\ No newline at end of file
+    return results_dict
+
+
+def deep_transfer_calc_batch(P_DL, P_LL, l, a, h=40, b=20, fc=4000, fy=60, tie_size=8, col1=24.0, col2=24.0, cover=5,
+                             area=None):
+    '''
+    Vectorized version of deep_transfer_calc for sweeps and lookup tables. Every argument
+    may be a scalar or a numpy array, arrays are broadcast against each other. Uses the
+    same strut and tie equations as deep_transfer_calc but skips the plotly figures, 
+    so thousands of beams can be evaluated in a single call. cover is the depth to the tie and 
+    node centroids (in), fixed at 5 in deep_transfer_calc. For non rectangular sections b is
+    the strut width and area the section area used for self weight (in^2, h*b when None), see
+    section_geometry.section_design_inputs. 
+
+    Returns dictionary of numpy arrays using the same keys as deep_transfer_calc where 
+    they overlap ('Phi-Vn', 'Number of ties', 'alpha_1', 'alpha_2') plus the intermediate 
+    forces 'Pu', 'R1', 'R2', 'F_ab', 'A_s_req' and the required nodal zone dimensions (in) 'l_horz_a', 
+    'l_vert_a', 'l_horz_b', 'l_vert_b', 'l_horz_c' and 'l_vert_c_1'. 
+    'Phi-Vn' is in lb like deep_transfer_calc (node dimensions use forces*1000), 'Phi-Vn (kip)' 
+    is the same capacity in kip for comparison with Pu and the reactions. 
+    '''
+    P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2, cover = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2, cover)])
+
+    #_________________________________Calculate Forces  ___________________________________#
+    Pu = factored_point_load(P_DL, P_LL, l, h, b, col1, col2, area)
+
+    b1 = l-a
+    r1 = (Pu*b1)/l
+    r2 = (Pu*a)/l
+
+    #____________________________Strut and Tie Analysis ______________________________#
+    d = h-cover
+
+    L_ac = np.sqrt((a*12)**2 + d**2)
+    L_bc = np.sqrt((b1*12)**2 + d**2)
+
+    F_ac = (r1*L_ac)/d
+    F_bc = (r2*L_bc)/d
+    F_ab = r1*((a*12)/d) # Tie Force 
+
+    strut_1_alpha = np.arctan((d-cover)/(a*12))
+    strut_2_alpha = np.arctan((d-cover)/(b1*12))
+
+    # Effective concrete strength of struts and nodes, see deep_transfer_calc for coefficients 
+    fce_ac = .85*.75*fc
+    fce_node_a = .85*.80*fc
+    fce_node_c = .85*1.0*fc
+
+    fce_a = np.minimum(np.minimum(.85*fc, fce_node_a), fce_ac)
+    fce_b = fce_a
+    fce_c = np.minimum(np.minimum(.85*fc, fce_node_c), fce_ac)
+
+    # Node C Geometry 
+    l_horz_c = (Pu*1000)/(.75*fce_c*b)
+    l_dia_c_1 = l_horz_c*(F_ac/Pu)
+    l_dia_c_2 = l_horz_c*(F_bc/Pu)
+    with np.errstate(invalid='ignore'):
+        l_vert_c_1 = np.sqrt(l_dia_c_1**2 - (l_horz_c/2)) # NaN where deep_transfer_calc raises
+
+    # Node A Geometry
+    l_vert_a = (F_ab*1000)/(.75*fce_a*b)
+    l_horz_a = (r1*1000)/(.75*fce_a*b)
+    l_dia_a = np.sqrt(l_vert_a**2 + l_horz_a**2)
+
+    # Node B Geometry
+    l_vert_b = (F_ab*1000)/(.75*fce_b*b)
+    l_horz_b = (r2*1000)/(.75*fce_b*b)
+    l_dia_b = np.sqrt(l_vert_b**2 + l_horz_b**2)
+
+    # Node Capacities 
+    vn_a = l_dia_a*b*fce_a*np.sin(strut_1_alpha)
+    vn_b = l_dia_b*b*fce_b*np.sin(strut_2_alpha)
+    vn_c = np.minimum(l_dia_c_1, l_dia_c_2)*b*fce_c*np.sin(np.minimum(strut_1_alpha, strut_2_alpha))
+
+    phi_Vn = .75*np.minimum(np.minimum(vn_a, vn_b), vn_c)
+
+    # Tie Reinforcement 
+    A_s_req = F_ab/(.75*fy)
+    tie_area = ((tie_size/8)**2)*math.pi/4
+    num_tie = np.ceil(A_s_req/tie_area)
+
+    return {'Phi-Vn': phi_Vn, 'Phi-Vn (kip)': phi_Vn/1000, 'Number of ties': num_tie, 'alpha_1': strut_1_alpha, 'alpha_2': strut_2_alpha,
+            'Pu': Pu, 'R1': r1, 'R2': r2, 'F_ab': F_ab, 'A_s_req': A_s_req,
+            'l_vert_c_1': l_vert_c_1, 'l_horz_a': l_horz_a, 'l_vert_a': l_vert_a, 'l_horz_b': l_horz_b,
+            'l_vert_b': l_vert_b, 'l_horz_c': l_horz_c}
@@ -0,0 +1,104 @@
+# IMPORTS
+import contextlib
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from beam_analysis import beam_load_analysis, max_shear_strength
+from deep_transfer_app import deep_transfer_calc
+from input_validation import INVALID_GEOMETRY, STM_UNAVAILABLE, describe_status, deep_transfer_calc_checked, validate_inputs
+from rc_beam_design import rc_beam_design
+
+
+# Inputs that can vary between alternatives, anything missing is taken from the base inputs
+ALTERNATIVE_INPUTS = ['h', 'b', 'fc', 'fy', 'tie_size', 'stirrup_size', 'skin_size', 'stirrup_legs', 'a', 'col1', 'col2']
+
+
+def design_alternative(P_DL, P_LL, l, a, h, b, fc=4000, fy=60, tie_size=8, stirrup_size=5, skin_size=5,
+                       stirrup_legs=2, col1=24.0, col2=24.0):
+    """
+    Runs the full single beam workflow for one design alternative, beam_load_analysis followed by
+    deep_transfer_calc for deep beams or rc_beam_design for bernoulli beams. Invalid inputs are
+    reported through 'Status' instead of raising, so one bad alternative does not stop a comparison.
+
+    Returns dictionary of summary values and the load diagram/design figures
+    """
+    status = int(validate_inputs(P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2))
+    summary = {'Deep Beam': None, 'Pu': math.nan, 'Vu': math.nan, 'Phi-Vn (kip)': math.nan, 'Phi_Vn_Max': math.nan,
+               'Number of ties': math.nan, 'alpha_1 (deg)': math.nan, 'alpha_2 (deg)': math.nan, 'As': math.nan}
+    figures = {}
+    if status & INVALID_GEOMETRY:
+        return {**summary, 'Status': ', '.join(describe_status(status)), 'Figures': figures}
+
+    # Silence the prints in the reference functions, they would interleave between workers
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_results = beam_load_analysis(P_DL=P_DL, P_LL=P_LL, l=l, a=a, h=h, b=b, col1=col1, col2=col2)
+        figures['Shear Diagram'] = load_results['Shear Diagram']
+        figures['Moment Diagram'] = load_results['Moment Diagram']
+        summary['Deep Beam'] = load_results['Deep Beam']
+        summary['Pu'] = load_results['Pu']
+        summary['Phi_Vn_Max'] = float(max_shear_strength(fc, b, h))
+
+        if load_results['Deep Beam']:
+            summary['Vu'] = max(load_results['R1'], load_results['R2'])
+            status = int(deep_transfer_calc_checked(P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2)['Status'])
+            if not status & STM_UNAVAILABLE:
+                design_results = deep_transfer_calc(P_DL=P_DL, P_LL=P_LL, l=l, a=a, h=h, b=b, fc=fc, fy=fy,
+                                                    tie_size=tie_size, stirrup_size=stirrup_size, skin_size=skin_size,
+                                                    stirrup_legs=stirrup_legs, col1=col1, col2=col2)
+                summary['Phi-Vn (kip)'] = design_results['Phi-Vn']/1000
+                summary['Number of ties'] = design_results['Number of ties']
+                summary['alpha_1 (deg)'] = math.degrees(design_results['alpha_1'])
+                summary['alpha_2 (deg)'] = math.degrees(design_results['alpha_2'])
+                figures['Strut and Tie Model'] = design_results['Strut and Tie Model']
+        else:
+            summary['Vu'] = load_results['Vu']
+            design_results = rc_beam_design(fc, fy, b, h, load_results['Mu'], load_results['Vu'], l, tie_size)
+            summary['Number of ties'] = design_results['Number of ties']
+            summary['As'] = design_results['As']
+
+    return {**summary, 'Status': ', '.join(describe_status(status)) or 'OK', 'Figures': figures}
+
+
+def design_executor(max_workers=None):
+    """
+    Returns a ProcessPoolExecutor for compare_alternatives, or None when only one CPU is available
+    and the alternatives are faster run in process. Workers are started with spawn rather than
+    forked, since the app server is multi-threaded and forking it can copy held locks.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def compare_alternatives(base_inputs, alternatives, executor=None, max_workers=None):
+    """
+    Computes design alternatives concurrently on a process pool.
+
+    base_inputs: dictionary of design_alternative keyword arguments shared by every alternative
+    alternatives: list of dictionaries overriding any of ALTERNATIVE_INPUTS
+    executor: existing concurrent.futures executor to reuse, a new one is created with
+              design_executor (and shut down) when None. Alternatives are run one after
+              another in process when there is a single CPU or a single alternative, as the
+              pool start up and figure pickling then cost more than they save.
+
+    Yields (index, result) as each alternative finishes, so results can be shown as they stream in
+    """
+    own_executor = executor is None
+    if own_executor and len(alternatives) > 1:
+        executor = design_executor(max_workers)
+    if executor is None:
+        for i, alternative in enumerate(alternatives):
+            yield i, design_alternative(**{**base_inputs, **alternative})
+        return
+
+    try:
+        futures = {executor.submit(design_alternative, **{**base_inputs, **alternative}): i
+                   for i, alternative in enumerate(alternatives)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,147 @@
+# IMPORTS
+import numpy as np
+import shapely
+from shapely import STRtree
+from beam_analysis import beam_load_analysis_batch, max_shear_strength
+from input_validation import COVER, deep_transfer_calc_checked, validate_inputs
+from rc_beam_design import rc_beam_design_batch
+from section_geometry import section_design_inputs
+
+
+def assign_columns_to_girders(column_x, column_y, girder_x1, girder_y1, girder_x2, girder_y2, tolerance=0.5,
+                              col1=24.0, col2=24.0):
+    """
+    Assigns each column above to the girder it lands on using a shapely STRtree spatial index,
+    girders are the line between their support column centers.
+
+    A column within col1/2 or col2/2 of a girder end stands over the support column and is carried
+    by the support, not the girder. Where girders meet, a column is assigned to the girder it lands
+    within the span of, so a column over a girder end that is midspan on a crossing girder loads that
+    girder. A column within the span of more than one girder goes to the nearest, then the lowest index.
+
+    column_x, column_y: Column center coordinates (ft)
+    girder_x1, girder_y1, girder_x2, girder_y2: Girder support coordinates (ft)
+    tolerance: Max distance from a column center to a girder centerline (ft)
+    col1, col2: Support column widths at each girder end (in)
+
+    Returns (girder index per column, -1 where the column does not load a girder,
+    distance along the girder from support 1 (ft), True where the column stands over a girder support)
+    """
+    columns = shapely.points(np.asarray(column_x, dtype=float), np.asarray(column_y, dtype=float))
+    girders = shapely.linestrings(np.stack([np.stack([girder_x1, girder_y1], axis=-1),
+                                            np.stack([girder_x2, girder_y2], axis=-1)], axis=1).astype(float))
+    col1 = np.broadcast_to(np.asarray(col1, dtype=float), girders.shape)
+    col2 = np.broadcast_to(np.asarray(col2, dtype=float), girders.shape)
+
+    # Every girder within the tolerance of each column, not just the nearest
+    tree = STRtree(girders)
+    column_idx, girder_idx = tree.query(columns, predicate='dwithin', distance=tolerance)
+    distance = shapely.distance(columns[column_idx], girders[girder_idx])
+    along = shapely.line_locate_point(girders[girder_idx], columns[column_idx])
+    in_span = (along >= col1[girder_idx]/24) & (along <= shapely.length(girders[girder_idx]) - col2[girder_idx]/24)
+
+    # Best match per column, in span first, then nearest, then lowest girder index
+    order = np.lexsort((girder_idx, distance, ~in_span, column_idx))
+    first = order[np.r_[True, column_idx[order][1:] != column_idx[order][:-1]]] if len(order) else order
+
+    girder = np.full(len(columns), -1, dtype=np.int64)
+    a = np.full(len(columns), np.nan)
+    at_support = np.zeros(len(columns), dtype=bool)
+    loads = first[in_span[first]]
+    girder[column_idx[loads]] = girder_idx[loads]
+    a[column_idx[loads]] = along[loads]
+    at_support[column_idx[first[~in_span[first]]]] = True
+    return girder, a, at_support
+
+
+def floor_transfer_analysis(columns, girders, tolerance=0.5):
+    """
+    Floor level transfer analysis, maps the columns above onto the girders below and runs the
+    deep beam/bernoulli beam classification and design for every girder in one batch.
+
+    columns: dictionary of arrays 'x', 'y' (ft), 'P_DL', 'P_LL' (kip)
+    girders: dictionary of arrays 'x1', 'y1', 'x2', 'y2' (ft), 'h', 'b' (in) and optionally
+             'fc' (psi), 'fy' (ksi), 'tie_size', 'col1', 'col2' (in). 'section' (shapely polygons from
+             section_geometry) can be given instead of 'h' and 'b' for flanged girders or webs with openings,
+             the strut and tie model then uses the effective strut width, the flexure design and Phi_Vn_Max the
+             web width and d = h - 5 in, and self weight the section area.
+
+    The strut and tie model supports a single point load, girders supporting more than one
+    column are designed for the summed loads at the location of their resultant.
+
+    Returns dictionary of per girder arrays, 'Column Count', 'l', 'a', 'P_DL', 'P_LL', 'Deep Beam', 'Vu',
+    'Phi_Vn_Max', 'Status' and 'Phi-Vn', 'Phi-Vn (kip)', 'alpha_1', 'alpha_2', 'Node Zone Ratio' (required over
+    available nodal zone, largest of the supports and tie zone, see deep_transfer_calc_checked) (deep beams), 'As', 'stirrup_spacing' (bernoulli beams),
+    'Number of ties' (both), plus 'Column Girder', the girder index each column loads, and 'Column At Support',
+    True for columns standing over a girder support, which are carried by the support rather than a girder
+    """
+    n = len(girders['x1'])
+    fc = np.broadcast_to(girders.get('fc', 4000), n).astype(float)
+    fy = np.broadcast_to(girders.get('fy', 60), n).astype(float)
+    tie_size = np.broadcast_to(girders.get('tie_size', 8), n).astype(float)
+    col1 = np.broadcast_to(girders.get('col1', 24.0), n).astype(float)
+    col2 = np.broadcast_to(girders.get('col2', 24.0), n).astype(float)
+    if 'section' in girders:
+        section = section_design_inputs(np.broadcast_to(girders['section'], n))
+        h, b, b_strut, area, d = section['h'], section['bw'], section['b_strut'], section['Area'], section['d']
+    else:
+        h = np.broadcast_to(girders['h'], n).astype(float)
+        b = np.broadcast_to(girders['b'], n).astype(float)
+        b_strut, area, d = b, None, None
+
+    column_girder, column_a, column_at_support = assign_columns_to_girders(columns['x'], columns['y'], girders['x1'], girders['y1'],
+                                                                           girders['x2'], girders['y2'], tolerance, col1, col2)
+    l = np.hypot(np.asarray(girders['x2'], dtype=float) - girders['x1'], np.asarray(girders['y2'], dtype=float) - girders['y1'])
+
+    # Sum column loads onto each girder, resultant location weighted by unfactored total load
+    landed = column_girder >= 0
+    idx = column_girder[landed]
+    P_DL = np.bincount(idx, weights=np.asarray(columns['P_DL'], dtype=float)[landed], minlength=n)
+    P_LL = np.bincount(idx, weights=np.asarray(columns['P_LL'], dtype=float)[landed], minlength=n)
+    P_total = np.asarray(columns['P_DL'], dtype=float)[landed] + np.asarray(columns['P_LL'], dtype=float)[landed]
+    count = np.bincount(idx, minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        a = np.bincount(idx, weights=P_total*column_a[landed], minlength=n)/np.bincount(idx, weights=P_total, minlength=n)
+    a = np.where(count > 0, a, np.nan)
+
+    # Web width and section d for sections, .9*h for rectangles, used for the reported value and the status alike
+    phi_vn_max = max_shear_strength(fc, b, h, d)
+
+    loads = beam_load_analysis_batch(P_DL, P_LL, l, a, h, b, col1, col2, area)
+    deep = loads['Deep Beam']
+
+    results = {'Column Count': count, 'l': l, 'a': a, 'P_DL': P_DL, 'P_LL': P_LL, 'Deep Beam': deep, 'Vu': loads['Vu'],
+               'Phi_Vn_Max': phi_vn_max, 'Column Girder': column_girder,
+               'Column At Support': column_at_support}
+
+    # Deep Beams - Strut and Tie
+    stm = deep_transfer_calc_checked(P_DL[deep], P_LL[deep], l[deep], a[deep], h[deep], b_strut[deep], fc[deep], fy[deep],
+                                     tie_size[deep], col1[deep], col2[deep], area=None if area is None else area[deep],
+                                     phi_vn_max=phi_vn_max[deep])
+    # Bernoulli Beams
+    flexure = rc_beam_design_batch(fc[~deep], fy[~deep], b[~deep], h[~deep], loads['Mu'][~deep], loads['Vu'][~deep],
+                                   tie_size[~deep], d=None if d is None else d[~deep])
+
+    # Girders without a column are flagged invalid
+    status = validate_inputs(P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2)
+    status[deep] = stm['Status']
+    results['Status'] = status
+
+    for key, source, mask in (('Phi-Vn', stm, deep), ('Phi-Vn (kip)', stm, deep), ('alpha_1', stm, deep), ('alpha_2', stm, deep),
+                              ('As', flexure, ~deep), ('stirrup_spacing', flexure, ~deep)):
+        full = np.full(n, np.nan)
+        full[mask] = source[key]
+        results[key] = full
+
+    node_ratio = np.full(n, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        node_ratio[deep] = np.fmax(np.fmax(stm['l_horz_a']/col1[deep], stm['l_horz_b']/col2[deep]),
+                                   np.fmax(stm['l_vert_a'], stm['l_vert_b'])/(2*COVER))
+    results['Node Zone Ratio'] = node_ratio
+
+    ties = np.full(n, np.nan)
+    ties[deep] = stm['Number of ties']
+    ties[~deep] = flexure['Number of ties']
+    results['Number of ties'] = ties
+
+    return results
@@ -0,0 +1,107 @@
+# IMPORTS
+import numpy as np
+from beam_analysis import max_shear_strength
+from deep_transfer_app import deep_transfer_calc_batch
+
+
+# Per-row status codes, combined as bit flags so a row can report more than one problem
+STATUS_OK = 0
+INVALID_GEOMETRY = 1       # Non-finite, zero or negative inputs, a outside of the span
+ALPHA_BELOW_25 = 2         # Strut to tie angle less than 25 degrees, ACI 318-14 23.2.7
+NODE_ZONE_EXCEEDED = 4     # Required nodal zone longer than the support column or deeper than the tie zone
+EXCEEDS_PHI_VN_MAX = 8     # Reaction exceeds maximum shear strength, ACI 318-14 Eq. 9.9.2.1
+NODE_C_GEOMETRY = 16       # Negative value under the square root for the node C vertical face
+SHALLOW_FOR_STM = 32       # h <= 2*cover, no room for the strut and tie model, deep beams only
+
+# Rows deep_transfer_calc can not be run for, the STM outputs of these rows are NaN
+STM_UNAVAILABLE = INVALID_GEOMETRY | NODE_C_GEOMETRY | SHALLOW_FOR_STM
+
+STATUS_MESSAGES = {
+    INVALID_GEOMETRY: 'Invalid or missing inputs, confirm all inputs are filled in and a is within the span',
+    ALPHA_BELOW_25: 'Alpha angle is less than 25 degrees, revise beam geometry',
+    NODE_ZONE_EXCEEDED: 'Required nodal zone exceeds the support column width or the tie zone depth (2*cover), revise beam width or supports',
+    EXCEEDS_PHI_VN_MAX: 'Beam exceeds maximum shear strength per ACI 318-14 Eq. 9.9.2.1',
+    NODE_C_GEOMETRY: 'Node C geometry is degenerate, revise beam geometry',
+    SHALLOW_FOR_STM: 'Beam depth is not more than twice the cover to the tie, too shallow for strut and tie design',
+}
+
+COVER = 5 # in, matches deep_transfer_calc
+
+
+def describe_status(code):
+    """
+    Returns list of messages for a single status code
+    """
+    return [message for flag, message in STATUS_MESSAGES.items() if int(code) & flag]
+
+
+def validate_inputs(P_DL, P_LL, l, a, h, b, fc=4000, fy=60, tie_size=8, col1=24.0, col2=24.0):
+    """
+    Checks beam_load_analysis/deep_transfer_calc inputs up front with vectorized masks,
+    every argument may be a scalar or an array.
+
+    Only checks that make a row impossible to analyse at all, limits of the strut and tie model
+    (h > 2*cover) are checked by deep_transfer_calc_checked.
+
+    Returns integer array of status codes, INVALID_GEOMETRY where a row can not be analysed
+    and STATUS_OK otherwise
+    """
+    P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2 = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2)])
+
+    with np.errstate(invalid='ignore'):
+        finite = np.all(np.isfinite([P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2]), axis=0)
+        invalid = (~finite | (P_DL < 0) | (P_LL < 0) | (l <= 0) | (a <= 0) | (a >= l) | (h <= 0)
+                   | (b <= 0) | (fc <= 0) | (fy <= 0) | (tie_size <= 0) | (col1 < 0) | (col2 < 0))
+
+    return np.where(invalid, INVALID_GEOMETRY, STATUS_OK).astype(np.int64)
+
+
+def deep_transfer_calc_checked(P_DL, P_LL, l, a, h=40, b=20, fc=4000, fy=60, tie_size=8, col1=24.0, col2=24.0, area=None,
+                               phi_vn_max=None):
+    """
+    Runs validate_inputs, then deep_transfer_calc_batch on the valid rows only. Invalid rows
+    are returned as NaN instead of raising, so one bad row does not abort a sweep. area is passed
+    through to deep_transfer_calc_batch for non rectangular sections, where b is the strut width and
+    phi_vn_max (kip) should be given from the web width and section d for the EXCEEDS_PHI_VN_MAX check,
+    max_shear_strength(fc, b, h) when None.
+
+    NODE_ZONE_EXCEEDED compares the nodal zones the reactions and tie force require with the geometry
+    available, the bearing length of the support columns (l_horz_a <= col1, l_horz_b <= col2) and the
+    tie zone, 2*cover deep (l_vert_a, l_vert_b <= 2*cover). The width of the column above is not an
+    input, so the node C bearing length is not checked.
+
+    Returns dictionary of deep_transfer_calc_batch results plus 'Status', the per-row status codes
+    """
+    args = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2)])
+    status = validate_inputs(*args)
+    # The tie and top node each take cover from the depth, only the strut and tie model needs h > 2*cover
+    shallow = (status == STATUS_OK) & (args[4] <= 2*COVER)
+    status[shallow] = SHALLOW_FOR_STM
+    valid = status == STATUS_OK
+
+    P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2 = [v[valid] for v in args]
+    if area is not None:
+        area = np.broadcast_to(np.asarray(area, dtype=float), valid.shape)[valid]
+    if phi_vn_max is not None:
+        phi_vn_max = np.broadcast_to(np.asarray(phi_vn_max, dtype=float), valid.shape)[valid]
+    res = deep_transfer_calc_batch(P_DL, P_LL, l, a, h, b, fc, fy, tie_size, col1, col2, area=area)
+
+    # Design checks on valid rows
+    Vu = np.maximum(res['R1'], res['R2'])
+    Phi_Vn_Max = max_shear_strength(fc, b, h) if phi_vn_max is None else phi_vn_max
+
+    checks = (np.where(np.minimum(res['alpha_1'], res['alpha_2']) < np.radians(25), ALPHA_BELOW_25, 0)
+              | np.where((res['l_horz_a'] > col1) | (res['l_horz_b'] > col2)
+                         | (np.maximum(res['l_vert_a'], res['l_vert_b']) > 2*COVER), NODE_ZONE_EXCEEDED, 0)
+              | np.where(Vu > Phi_Vn_Max, EXCEEDS_PHI_VN_MAX, 0)
+              | np.where(np.isnan(res['l_vert_c_1']), NODE_C_GEOMETRY, 0))
+    status[valid] = checks
+
+    results = {}
+    for key, value in res.items():
+        full = np.full(status.shape, np.nan)
+        full[valid] = value
+        results[key] = full
+    results['Status'] = status
+    return results
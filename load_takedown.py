@@ -0,0 +1,88 @@
+# IMPORTS
+import numpy as np
+
+
+def live_load_reduction(influence_area, n_floors, Lo=50, k_ll=4):
+    """
+    Live load reduction factor per ASCE 7-16 4.7.2, L = Lo*(0.25 + 15/sqrt(K_LL*A_T)).
+
+    influence_area: Summed tributary area supported by the column (ft^2)
+    n_floors: Number of floors supported, the factor is limited to 0.5 for one floor and 0.4 otherwise
+    Lo: Unreduced live load (psf), loads over 100 psf are not reduced (ASCE 7-16 4.7.3)
+    k_ll: Live load element factor, 4 for interior columns and 2 for exterior columns without cantilevers
+
+    Returns array of reduction factors L/Lo
+    """
+    influence_area, n_floors, Lo, k_ll = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (influence_area, n_floors, Lo, k_ll)])
+    with np.errstate(divide='ignore'):
+        factor = 0.25 + 15/np.sqrt(k_ll*influence_area)
+    factor = np.maximum(factor, np.where(n_floors > 1, 0.4, 0.5))
+    return np.where((k_ll*influence_area >= 400) & (Lo <= 100), np.minimum(factor, 1.0), 1.0)
+
+
+def column_takedown(trib_area, dead_load, live_load, column_weight=0.0, k_ll=4, roof=False):
+    """
+    Accumulates column loads down a stack of floors for many columns at once. Inputs are arrays of
+    shape (n_floors, n_columns) with the top floor first, or (n_floors,) for a single column, and are
+    broadcast against each other.
+
+    trib_area: Tributary area of the column at each floor (ft^2)
+    dead_load: Superimposed dead load at each floor (psf)
+    live_load: Unreduced live load at each floor (psf)
+    column_weight: Self weight of the column below each floor (kip)
+    k_ll: Live load element factor of each column
+    roof: the first row is the roof. Roof live load is reduced under ASCE 7-16 4.8 rather than 4.7,
+          which is not implemented, so the roof row is carried unreduced and is left out of the
+          influence area and floor count used for the 4.7 reduction.
+
+    Returns dictionary of arrays with the column forces below each floor (kip), 'P_DL', 'P_LL'
+    (reduced), 'P_LL_unreduced' and 'LL Reduction'. The last row is the force delivered to the
+    level below the stack, see transfer_forces.
+    """
+    trib_area, dead_load, live_load, column_weight = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (trib_area, dead_load, live_load, column_weight)])
+
+    P_DL = np.cumsum(trib_area*dead_load/1000 + column_weight, axis=0)
+
+    # Loads over 100 psf and roof live load are accumulated separately and never reduced
+    reducible = live_load <= 100
+    if roof:
+        reducible[0] = False
+    LL_reducible = np.cumsum(np.where(reducible, trib_area*live_load, 0)/1000, axis=0)
+    LL_fixed = np.cumsum(np.where(reducible, 0, trib_area*live_load)/1000, axis=0)
+    influence_area = np.cumsum(np.where(reducible & (live_load > 0), trib_area, 0), axis=0)
+    n_floors = np.cumsum(reducible & (live_load > 0), axis=0)
+
+    reduction = live_load_reduction(influence_area, n_floors, k_ll=k_ll)
+    P_LL = LL_reducible*reduction + LL_fixed
+
+    return {'P_DL': P_DL, 'P_LL': P_LL, 'P_LL_unreduced': LL_reducible + LL_fixed, 'LL Reduction': reduction}
+
+
+def floor_load_table(column, floor, n_columns, trib_area, dead_load, live_load, column_weight=0.0):
+    """
+    Arranges a long table of column loads, one row per column per floor, into the (n_floors, n_columns)
+    arrays used by column_takedown. Columns missing at a floor contribute nothing at that floor, a repeated
+    column and floor keeps the last row.
+
+    column: index of the column each row belongs to, 0 to n_columns - 1
+    floor: floor of each row counted down from the top, 0 is the top floor (or roof)
+
+    Returns dictionary of 'trib_area', 'dead_load', 'live_load' and 'column_weight' arrays
+    """
+    column, floor = np.asarray(column, dtype=np.int64), np.asarray(floor, dtype=np.int64)
+    shape = (int(floor.max()) + 1 if len(floor) else 0, int(n_columns))
+    table = {}
+    for key, value in (('trib_area', trib_area), ('dead_load', dead_load), ('live_load', live_load),
+                       ('column_weight', column_weight)):
+        table[key] = np.zeros(shape)
+        table[key][floor, column] = value
+    return table
+
+
+def transfer_forces(takedown):
+    """
+    Returns the unfactored transfer forces at the bottom of the stack as a dictionary of 'P_DL' and
+    'P_LL', which can be passed straight into beam_load_analysis_batch or deep_transfer_calc_checked
+    """
+    return {'P_DL': takedown['P_DL'][-1], 'P_LL': takedown['P_LL'][-1]}
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 import plotly.graph_objects as go 
 from shapely import Polygon
 
@@ -69,4 +70,45 @@ def rc_beam_design(fc, fy, b, h, Mu, Vu, l, tie_size:int):
         'As_max': As_max,
         'Vc': Vc,
         'stirrup_spacing': stirrup_spacing
-    }
\ No newline at end of file
+    }
+
+
+def rc_beam_design_batch(fc, fy, b, h, Mu, Vu, tie_size, d=None):
+    """
+    Vectorized version of rc_beam_design without the reinforcement figure, every argument 
+    may be a scalar or a numpy array. stirrup_spacing is NaN where no stirrups are required.
+    d is the effective depth (in), .9*h as in rc_beam_design when None. For non rectangular 
+    sections b is the web width, see section_geometry.section_design_inputs.
+    """
+    fc, fy, b, h, Mu, Vu, tie_size, d = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (fc, fy, b, h, Mu, Vu, tie_size, np.nan if d is None else d)])
+
+    phi_flexure = 0.9
+    phi_shear = 0.75
+    tie_area = (tie_size**2)*math.pi/4
+    d = np.where(np.isnan(d), .9*h, d)
+
+    beta1 = np.minimum(0.85, np.maximum(0.85 - 0.05 * ((fc - 4000) / 1000), 0.65))
+    rho_min = np.maximum(3 * np.sqrt(fc) / fy, 200 / fy)
+    rho_max = 0.75 * beta1 * (fc / fy) * (60000 / fy)
+
+    As_min = rho_min * b * d
+    As_max = rho_max * b * d
+
+    a = (Mu / (phi_flexure * 0.85 * fc * b))**(1/2)
+    As = Mu / (phi_flexure * fy * (d - a/2))
+    As = np.where(As < As_min, As_min, np.where(As > As_max, As_max, As))
+
+    Vc = 2 * (fc**0.5) * b * d / 1000
+    with np.errstate(divide='ignore'):
+        Vs = (Vu - phi_shear * Vc) / phi_shear
+        stirrup_spacing = np.where(Vu > phi_shear * Vc, (phi_shear * 0.75 * fy * b * d) / Vs, np.nan)
+
+    return {
+        'As': As,
+        'Number of ties': np.ceil(As/tie_area),
+        'As_min': As_min,
+        'As_max': As_max,
+        'Vc': Vc,
+        'stirrup_spacing': stirrup_spacing
+    }
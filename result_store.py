@@ -0,0 +1,140 @@
+# IMPORTS
+import hashlib
+import json
+import os
+import numpy as np
+
+
+MANIFEST = 'manifest.json'
+COMPLETED = 'completed.npy'
+
+
+def _column_path(path, name):
+    return os.path.join(path, name.replace(' ', '_').replace('/', '_') + '.npy')
+
+
+def create_result_store(path, n_rows, columns, chunk_size=100_000, fingerprint=None):
+    """
+    Creates a chunked, columnar result store in directory path. Each column is a .npy file
+    preallocated for n_rows so it can be written and read through a memory map.
+
+    columns: dictionary of column name: numpy dtype
+    chunk_size: rows per chunk, chunks are the unit of work that is recorded as completed
+    fingerprint: identifies the sweep that fills the store, see sweep_fingerprint
+    """
+    os.makedirs(path, exist_ok=True)
+    # An existing store is invalidated first, so an interrupted rebuild is never read as the old sweep
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        os.remove(os.path.join(path, MANIFEST))
+    n_chunks = -(-n_rows // chunk_size)
+    manifest = {'n_rows': int(n_rows), 'chunk_size': int(chunk_size), 'n_chunks': int(n_chunks), 'fingerprint': fingerprint,
+                'columns': {name: np.dtype(dtype).str for name, dtype in columns.items()}}
+
+    for name, dtype in columns.items():
+        np.lib.format.open_memmap(_column_path(path, name), mode='w+', dtype=dtype, shape=(n_rows,)).flush()
+    np.save(os.path.join(path, COMPLETED), np.zeros(n_chunks, dtype=bool))
+
+    # Manifest written last, a store without one is treated as not created
+    with open(os.path.join(path, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(path):
+    """
+    Returns the store manifest or None if path is not a result store
+    """
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def completed_chunks(path):
+    """
+    Returns boolean array of which chunks have been written
+    """
+    return np.load(os.path.join(path, COMPLETED))
+
+
+def write_chunk(path, manifest, chunk, results):
+    """
+    Writes one chunk of results (dictionary of arrays) into the store, then marks it completed.
+    The data is flushed before the completed flag so an interrupted write is redone on resume.
+    """
+    start = chunk*manifest['chunk_size']
+    stop = min(start + manifest['chunk_size'], manifest['n_rows'])
+
+    for name in manifest['columns']:
+        column = np.load(_column_path(path, name), mmap_mode='r+')
+        column[start:stop] = results[name]
+        column.flush()
+        del column
+
+    completed = np.load(os.path.join(path, COMPLETED), mmap_mode='r+')
+    completed[chunk] = True
+    completed.flush()
+
+
+def open_result_store(path):
+    """
+    Opens a result store for reading, returns dictionary of read-only memory mapped columns plus
+    'Completed Rows', a boolean mask of rows belonging to completed chunks. Nothing is loaded
+    into memory until it is indexed.
+    """
+    manifest = read_manifest(path)
+    store = {name: np.load(_column_path(path, name), mmap_mode='r') for name in manifest['columns']}
+    store['Completed Rows'] = np.repeat(completed_chunks(path), manifest['chunk_size'])[:manifest['n_rows']]
+    return store
+
+
+def sweep_fingerprint(func, inputs, block_size=1_000_000):
+    """
+    Returns a hash of the function (module and qualified name) and of every input column's name, dtype
+    and values, read in blocks so memory mapped inputs are not loaded at once
+    """
+    digest = hashlib.sha256(f'{func.__module__}.{func.__qualname__}'.encode())
+    for key in sorted(inputs):
+        column = inputs[key]
+        digest.update(f'{key}:{np.asarray(column[:1]).dtype.str}:{len(column)}'.encode())
+        for start in range(0, len(column), block_size):
+            digest.update(np.ascontiguousarray(column[start:start + block_size]).tobytes())
+    return digest.hexdigest()
+
+
+def sweep_to_store(path, func, inputs, chunk_size=100_000, keep_inputs=True):
+    """
+    Runs func over inputs chunk by chunk and writes the results into a result store at path.
+    If the store already exists for the same function, inputs and chunk size (see sweep_fingerprint),
+    completed chunks are skipped so an interrupted sweep resumes where it stopped. Any other store at
+    path is overwritten.
+
+    func: batch function taking the inputs as keyword arrays and returning a dictionary of arrays,
+          e.g. deep_transfer_calc_checked or rc_beam_design_batch
+    inputs: dictionary of equal length input arrays (may be memory mapped)
+    keep_inputs: also store the input columns, so results can be filtered by input
+
+    Returns the store opened with open_result_store
+    """
+    n_rows = len(next(iter(inputs.values())))
+    manifest = read_manifest(path)
+    fingerprint = sweep_fingerprint(func, inputs)
+
+    if (manifest is None or manifest['n_rows'] != n_rows or manifest['chunk_size'] != chunk_size
+            or manifest.get('fingerprint') != fingerprint):
+        # Run the first chunk to find the output columns and dtypes
+        first = func(**{key: np.asarray(value[:chunk_size]) for key, value in inputs.items()})
+        columns = {key: np.asarray(value).dtype for key, value in first.items()}
+        if keep_inputs:
+            columns.update({key: np.asarray(value[:1]).dtype for key, value in inputs.items() if key not in columns})
+        manifest = create_result_store(path, n_rows, columns, chunk_size, fingerprint)
+        write_chunk(path, manifest, 0, {**{key: value[:chunk_size] for key, value in inputs.items()}, **first})
+
+    done = completed_chunks(path)
+    for chunk in np.flatnonzero(~done):
+        rows = slice(chunk*chunk_size, min((chunk + 1)*chunk_size, n_rows))
+        chunk_inputs = {key: np.asarray(value[rows]) for key, value in inputs.items()}
+        write_chunk(path, manifest, chunk, {**chunk_inputs, **func(**chunk_inputs)})
+
+    return open_result_store(path)
@@ -0,0 +1,79 @@
+# IMPORTS
+import numpy as np
+import plotly.graph_objects as go
+
+
+def beam_utilization(results):
+    """
+    Returns dictionary of per beam utilization arrays from floor_transfer_analysis results,
+    'Utilization' (governing ratio of the checks the design makes, Vu/Phi_Vn_Max and for deep beams
+    the 'Node Zone Ratio', above 1 fails), 'Max Shear Ratio' (Vu/Phi_Vn_Max), 'Node Zone Ratio' (deep beams only),
+    'Alpha Margin' (smallest strut angle less 25 degrees, deep beams only) and 'Number of ties'.
+    Every girder carrying a column has a finite 'Utilization', girders without a load are NaN.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        max_shear_ratio = results['Vu']/results['Phi_Vn_Max']
+        return {'Utilization': np.where(results['Deep Beam'], np.fmax(max_shear_ratio, results['Node Zone Ratio']), max_shear_ratio),
+                'Max Shear Ratio': max_shear_ratio,
+                'Node Zone Ratio': results['Node Zone Ratio'],
+                'Alpha Margin': np.degrees(np.minimum(results['alpha_1'], results['alpha_2'])) - 25,
+                'Number of ties': results['Number of ties']}
+
+
+def hidden_beams(utilization, x_key, y_key):
+    """
+    Returns indices of the beams overview_figure can not plot, NaN on either axis (e.g. no column
+    on the girder, or 'Alpha Margin' for a bernoulli beam), so they can be listed separately
+    """
+    return np.flatnonzero(~(np.isfinite(utilization[x_key]) & np.isfinite(utilization[y_key])))
+
+
+def downsample_overview(x, y, value, max_points=5000, bins=150):
+    """
+    Server side aggregation for the overview plot. Below max_points every beam is returned, above it
+    the x/y plane is binned and only the beam with the largest value in each bin is kept, so the
+    worst beams stay visible and clickable while the browser draws at most bins^2 points.
+
+    Returns (indices of the beams to plot, number of beams each plotted point represents)
+    """
+    x, y, value = np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(value, dtype=float)
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if len(valid) <= max_points:
+        return valid, np.ones(len(valid), dtype=np.int64)
+
+    x_bin = np.digitize(x[valid], np.linspace(x[valid].min(), x[valid].max(), bins + 1)[1:-1])
+    y_bin = np.digitize(y[valid], np.linspace(y[valid].min(), y[valid].max(), bins + 1)[1:-1])
+    cell = x_bin*bins + y_bin
+
+    # Sort by cell then by value descending, the first beam of each cell is the worst one
+    order = np.lexsort((-np.nan_to_num(value[valid], nan=-np.inf), cell))
+    first = np.flatnonzero(np.r_[True, cell[order][1:] != cell[order][:-1]])
+    counts = np.diff(np.r_[first, len(order)])
+    return valid[order[first]], counts
+
+
+def overview_figure(utilization, x_key='Utilization', y_key='Number of ties', color_key='Max Shear Ratio',
+                    max_points=5000, bins=150, title='Transfer Level Overview'):
+    """
+    Returns WebGL scatter of every beam in the schedule, downsampled with downsample_overview.
+    The beam index is stored in customdata so a selected point can be traced back to its beam.
+    Any dictionary of equal length arrays can be plotted, e.g. the columns of a result store.
+    Beams with NaN on either axis are left out, see hidden_beams.
+    """
+    index, counts = downsample_overview(utilization[x_key], utilization[y_key], utilization[x_key], max_points, bins)
+
+    fig = go.Figure(go.Scattergl(
+        x=utilization[x_key][index],
+        y=utilization[y_key][index],
+        mode='markers',
+        customdata=np.stack([index, counts], axis=-1),
+        marker=dict(color=utilization[color_key][index], colorscale='Viridis', showscale=True,
+                    colorbar=dict(title=color_key), size=7),
+        hovertemplate=f'Beam %{{customdata[0]}}<br>{x_key} = %{{x:.3g}}<br>{y_key} = %{{y:.3g}}'
+                      '<br>Beams in bin = %{customdata[1]}<extra></extra>'
+    ))
+    plottable = len(utilization[x_key]) - len(hidden_beams(utilization, x_key, y_key))
+    if len(index) < plottable:
+        title += f' ({len(index)} of {plottable} beams shown, worst per bin)'
+    fig.update_layout(title=title, xaxis_title=x_key, yaxis_title=y_key, width=800, height=600)
+    return fig
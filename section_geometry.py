@@ -0,0 +1,215 @@
+# IMPORTS
+import numpy as np
+import shapely
+
+
+# Sections are shapely polygons in inches, x across the width and y up from the bottom of the beam.
+# Every function takes and returns arrays so a sweep of sections is processed in one call.
+
+
+def rectangular_section(b, h):
+    """
+    Returns rectangular section(s), an array when b or h are arrays
+    b: width (in)
+    h: height (in)
+    """
+    b, h = np.broadcast_arrays(np.asarray(b, dtype=float), np.asarray(h, dtype=float))
+    return shapely.box(-b/2, 0, b/2, h)
+
+
+def flanged_section(bw, h, bf, hf, one_sided=False):
+    """
+    Returns T section(s), or L sections when one_sided is True, flange at the top. An array
+    when any input is an array
+
+    bw: web width (in)
+    h: total height (in)
+    bf: flange width (in)
+    hf: flange thickness (in)
+    """
+    bw, h, bf, hf, one_sided = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (bw, h, bf, hf)],
+                                                   np.asarray(one_sided, dtype=bool))
+    web = shapely.box(-bw/2, 0, bw/2, h)
+    flange_left = np.where(one_sided, -bw/2, -bf/2)
+    flange_right = np.where(one_sided, bf - bw/2, bf/2)
+    flange = shapely.box(flange_left, h - hf, flange_right, h)
+    return shapely.union(web, flange)
+
+
+def with_openings(sections, x_min, y_min, x_max, y_max):
+    """
+    Returns sections with a rectangular opening removed, for services through the web.
+    Openings may be arrays matching the sections, use repeated calls for more than one opening.
+    """
+    return shapely.difference(sections, shapely.box(x_min, y_min, x_max, y_max))
+
+
+def _ring_segments(sections):
+    """
+    Returns section index and the start/end coordinates of every boundary segment, exteriors
+    counter clockwise and openings clockwise so the signed sums below subtract the openings
+    """
+    sections = shapely.orient_polygons(np.asarray(sections), exterior_cw=False)
+    rings, section_idx = shapely.get_rings(sections, return_index=True)
+    coords, ring_idx = shapely.get_coordinates(rings, return_index=True)
+
+    # Rings are closed, so consecutive points on the same ring form a segment
+    same_ring = ring_idx[:-1] == ring_idx[1:]
+    start, end = coords[:-1][same_ring], coords[1:][same_ring]
+    return section_idx[ring_idx[:-1][same_ring]], start, end
+
+
+def section_properties(sections):
+    """
+    Returns dictionary of arrays for arbitrary section polygons including openings,
+    'Area' (in^2), 'x_c', 'y_c' (centroid, in), 'Ix', 'Iy' (about the centroid, in^4),
+    'y_top', 'y_bot' (extreme fibres, in)
+    """
+    sections = np.atleast_1d(np.asarray(sections))
+    n = len(sections)
+    idx, start, end = _ring_segments(sections)
+    x0, y0, x1, y1 = start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+    cross = x0*y1 - x1*y0
+
+    area = np.bincount(idx, cross, minlength=n)/2
+    x_c = np.bincount(idx, (x0 + x1)*cross, minlength=n)/(6*area)
+    y_c = np.bincount(idx, (y0 + y1)*cross, minlength=n)/(6*area)
+    Ix = np.bincount(idx, (y0**2 + y0*y1 + y1**2)*cross, minlength=n)/12 - area*y_c**2
+    Iy = np.bincount(idx, (x0**2 + x0*x1 + x1**2)*cross, minlength=n)/12 - area*x_c**2
+
+    bounds = shapely.bounds(sections)
+    return {'Area': area, 'x_c': x_c, 'y_c': y_c, 'Ix': Ix, 'Iy': Iy, 'y_top': bounds[:, 3], 'y_bot': bounds[:, 1]}
+
+
+def _area_above(idx, start, end, y_cut, n):
+    """
+    Area of each section above y_cut from its boundary segments. By Green's theorem the area is
+    the integral of x dy around the clipped boundary, and the cut line itself adds nothing as dy = 0,
+    so each segment is just clipped to y >= y_cut.
+    """
+    x0, y0, x1, y1 = start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+    cut = y_cut[idx]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cut = x0 + (cut - y0)/(y1 - y0)*(x1 - x0)
+        xa, ya = np.where(y0 >= cut, x0, x_cut), np.maximum(y0, cut)
+        xb, yb = np.where(y1 >= cut, x1, x_cut), np.maximum(y1, cut)
+        return np.bincount(idx, np.where(yb != ya, (xa + xb)/2*(yb - ya), 0), minlength=n)
+
+
+def compression_area(sections, depth):
+    """
+    Returns area of each section within depth (in) of its top fibre
+    """
+    sections, depth = np.broadcast_arrays(np.atleast_1d(np.asarray(sections)), np.asarray(depth, dtype=float))
+    idx, start, end = _ring_segments(sections)
+    return _area_above(idx, start, end, shapely.bounds(sections)[:, 3] - depth, len(sections))
+
+
+def compression_block_depth(sections, As, fc=4000, fy=60, tol=1e-4, max_iter=60):
+    """
+    Depth of the equivalent rectangular stress block, a, for a given tension steel area by
+    bisection on 0.85*fc*A_comp(a) = As*fy, all sections solved together.
+
+    As: Tension reinforcement area (in^2)
+    fc: Concrete compressive strength (psi)
+    fy: Reinforcement yield strength (ksi)
+
+    Returns array of a (in), NaN where the whole section can not balance As*fy
+    """
+    sections, As, fc, fy = np.broadcast_arrays(np.atleast_1d(np.asarray(sections)), *[np.asarray(v, dtype=float) for v in (As, fc, fy)])
+    n = len(sections)
+    idx, start, end = _ring_segments(sections)
+    bounds = shapely.bounds(sections)
+    force = As*fy*1000
+    concrete = 0.85*fc
+
+    low, high = np.zeros(n), bounds[:, 3] - bounds[:, 1]
+    for _ in range(max_iter):
+        mid = (low + high)/2
+        too_small = concrete*_area_above(idx, start, end, bounds[:, 3] - mid, n) < force
+        low = np.where(too_small, mid, low)
+        high = np.where(too_small, high, mid)
+        if np.all(high - low < tol):
+            break
+
+    a = (low + high)/2
+    return np.where(concrete*shapely.area(sections) >= force, a, np.nan)
+
+
+def _width_at(idx, start, end, y, n):
+    """
+    Width of each section at height y from its boundary segments. With exteriors counter clockwise,
+    upward segments cross on the right and downward segments on the left (reversed for openings),
+    so the width is the signed sum of the crossing x coordinates.
+    """
+    x0, y0, x1, y1 = start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+    level = y[idx]
+    crosses = ((y0 <= level) & (level < y1)) | ((y1 <= level) & (level < y0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x0 + (level - y0)/(y1 - y0)*(x1 - x0)
+        return np.bincount(idx, np.where(crosses, np.sign(y1 - y0)*x_cross, 0), minlength=n)
+
+
+def width_at(sections, y):
+    """
+    Returns width of each section at height y (in), openings at that height are excluded
+    """
+    sections, y = np.broadcast_arrays(np.atleast_1d(np.asarray(sections)), np.asarray(y, dtype=float))
+    idx, start, end = _ring_segments(sections)
+    return _width_at(idx, start, end, y, len(sections))
+
+
+def effective_strut_width(sections, y_bottom, y_top, eps=1e-6):
+    """
+    Effective width of a diagonal strut for the strut and tie model, taken as the smallest section
+    width between the bottom node (tie) and the top node, so webs and openings govern over flanges.
+    Can be used in place of b in the node and strut area calculations of deep_transfer_calc.
+
+    The width is piecewise linear between the vertex heights, so the minimum is found exactly by
+    evaluating just below and just above every vertex between y_bottom and y_top, and at both ends.
+
+    Returns array of strut widths (in)
+    """
+    sections, y_bottom, y_top = np.broadcast_arrays(np.atleast_1d(np.asarray(sections)), np.asarray(y_bottom, dtype=float),
+                                                    np.asarray(y_top, dtype=float))
+    n = len(sections)
+    idx, start, end = _ring_segments(sections)
+
+    # Candidate levels per section, vertex heights on either side plus the node levels
+    level_section = np.concatenate([idx, idx, np.arange(n), np.arange(n)])
+    level_y = np.concatenate([start[:, 1] - eps, start[:, 1] + eps, y_bottom, y_top])
+    inside = (level_y >= y_bottom[level_section]) & (level_y <= y_top[level_section])
+    level_section, level_y = level_section[inside], level_y[inside]
+
+    # Pair each level with every segment of its section, each level is then treated as its own section
+    seg_start = np.searchsorted(idx, np.arange(n))
+    seg_count = np.bincount(idx, minlength=n)
+    pair_level = np.repeat(np.arange(len(level_y)), seg_count[level_section])
+    pair_seg = seg_start[level_section][pair_level] + (np.arange(len(pair_level))
+                                                      - np.repeat(np.cumsum(seg_count[level_section]) - seg_count[level_section],
+                                                                  seg_count[level_section]))
+    widths = _width_at(pair_level, start[pair_seg], end[pair_seg], level_y, len(level_y))
+
+    strut_width = np.full(n, np.inf)
+    np.minimum.at(strut_width, level_section, widths)
+    return strut_width
+
+
+def section_design_inputs(sections, cover=5):
+    """
+    Converts sections into the rectangular inputs of the batch design paths, so beam_load_analysis_batch,
+    deep_transfer_calc_batch and rc_beam_design_batch can be run on flanged sections and webs with openings.
+
+    cover: depth from the bottom fibre to the tie and tension steel centroid, and from the top fibre
+           to the top node (in)
+
+    Returns dictionary of arrays, 'h' (overall height, in), 'Area' (for self weight, in^2), 'b_strut'
+    (effective_strut_width between the tie and the top node, for deep_transfer_calc_batch b), 'bw'
+    (width at the tension steel, for rc_beam_design_batch b) and 'd' (effective depth, in)
+    """
+    sections = np.atleast_1d(np.asarray(sections))
+    props = section_properties(sections)
+    h = props['y_top'] - props['y_bot']
+    return {'h': h, 'Area': props['Area'],
+            'b_strut': effective_strut_width(sections, props['y_bot'] + cover, props['y_top'] - cover),
+            'bw': width_at(sections, props['y_bot'] + cover), 'd': h - cover}
@@ -0,0 +1,65 @@
+# IMPORTS
+import numpy as np
+import plotly.graph_objects as go
+from deep_transfer_app import deep_transfer_calc_batch
+
+
+# Inputs perturbed by stm_sensitivity, in the order they are passed to deep_transfer_calc_batch
+SENSITIVITY_INPUTS = ['P_DL', 'P_LL', 'l', 'a', 'h', 'b', 'fc', 'fy', 'col1', 'col2', 'cover']
+
+# Outputs reported, the tie count is a step function so its sensitivity is taken from the
+# required tie area A_s_req, the low/high tie counts are still reported for the tornado chart
+SENSITIVITY_OUTPUTS = ['Phi-Vn', 'A_s_req', 'Number of ties', 'alpha_1', 'alpha_2']
+
+
+def stm_sensitivity(inputs, rel_step=0.05, tie_size=8):
+    """
+    Perturbs every input of deep_transfer_calc_batch by +/- rel_step in one batched evaluation of
+    1 + 2N rows rather than 2N separate reruns.
+
+    inputs: dictionary with every key in SENSITIVITY_INPUTS (cover defaults to 5 in)
+    rel_step: relative perturbation, inputs equal to zero are not perturbed
+
+    Returns dictionary of 'Inputs' (names), 'Base' (output: value), 'Low' and 'High' (output: array of
+    results with each input decreased/increased) and 'Sensitivity' (output: array of normalized
+    sensitivities, (dy/y)/(dx/x) by central difference)
+    """
+    base = np.array([float(inputs.get(name, 5.0 if name == 'cover' else 0.0)) for name in SENSITIVITY_INPUTS])
+    n = len(base)
+
+    # Row 0 is the base case, rows 1..n decrease one input each and rows n+1..2n increase it
+    step = rel_step*base
+    rows = np.tile(base, (2*n + 1, 1))
+    rows[1 + np.arange(n), np.arange(n)] -= step
+    rows[1 + n + np.arange(n), np.arange(n)] += step
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        res = deep_transfer_calc_batch(tie_size=tie_size, **dict(zip(SENSITIVITY_INPUTS, rows.T)))
+
+        results = {'Inputs': list(SENSITIVITY_INPUTS), 'Base': {}, 'Low': {}, 'High': {}, 'Sensitivity': {}}
+        for output in SENSITIVITY_OUTPUTS:
+            y = res[output]
+            results['Base'][output] = y[0]
+            results['Low'][output] = y[1:n + 1]
+            results['High'][output] = y[n + 1:]
+            results['Sensitivity'][output] = np.where(step != 0, (y[n + 1:] - y[1:n + 1])/(2*rel_step*y[0]), 0.0)
+    return results
+
+
+def tornado_chart(results, output):
+    """
+    Returns plotly tornado chart of the change in output when each input is decreased/increased,
+    inputs sorted with the largest swing at the top
+    """
+    base = results['Base'][output]
+    low = results['Low'][output] - base
+    high = results['High'][output] - base
+    order = np.argsort(np.abs(high - low))
+    names = [results['Inputs'][i] for i in order]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=names, x=low[order], orientation='h', name='Input decreased', marker=dict(color='blue')))
+    fig.add_trace(go.Bar(y=names, x=high[order], orientation='h', name='Input increased', marker=dict(color='red')))
+    fig.update_layout(title=f'Sensitivity of {output} (base = {base:.3g})', barmode='overlay',
+                      xaxis_title=f'Change in {output}', yaxis_title='Input', width=575, height=500)
+    return fig
@@ -0,0 +1,293 @@
+# IMPORTS
+import contextlib
+import io
+import math
+import os
+import sys
+import tempfile
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import beam_analysis
+import deep_transfer_app
+import rc_beam_design
+from capacity_tables import build_capacity_table, quick_capacity_check
+from input_validation import STATUS_OK, STM_UNAVAILABLE, deep_transfer_calc_checked
+
+# Differential verification of the batch (fast) paths against the scalar reference functions
+# beam_load_analysis, deep_transfer_calc and rc_beam_design on a seeded random corpus, and of the
+# cached capacity table (quick check) against the batch path it is built from.
+
+
+TIE_SIZES = [4, 5, 6, 7, 8, 9, 10, 11, 14]
+
+REFERENCE_KEYS = {
+    'beam_load_analysis': ['Deep Beam', 'Pu', 'R1', 'R2', 'Vu', 'Mu'],
+    'deep_transfer_calc': ['Phi-Vn', 'Number of ties', 'alpha_1', 'alpha_2'],
+    'rc_beam_design': ['As', 'Number of ties', 'As_min', 'As_max', 'Vc', 'stirrup_spacing'],
+}
+
+
+class _NullFigure:
+    """
+    Stand in for plotly figures and traces, accepts any call so the reference functions run their
+    arithmetic unchanged without spending most of their time building figures
+    """
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+@contextlib.contextmanager
+def figures_disabled():
+    """
+    Replaces plotly in the reference modules with _NullFigure and silences their print statements
+    """
+    modules = (beam_analysis, deep_transfer_app, rc_beam_design)
+    originals = [module.go for module in modules]
+    null_go = types.SimpleNamespace(Figure=_NullFigure, Scatter=_NullFigure)
+    try:
+        for module in modules:
+            module.go = null_go
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        for module, original in zip(modules, originals):
+            module.go = original
+
+
+def generate_corpus(n, seed=0, edge_fraction=0.2):
+    """
+    Returns dictionary of n input rows for all three reference functions. Most rows are typical
+    transfer beams spanning both the deep beam and bernoulli cases, edge_fraction of the rows are
+    edge cases: the l*12/h = 4 boundary, loads next to a support, h just above 2*cover, alpha at
+    25 degrees, zero live load and invalid geometry (a at a support, zero width, h below cover).
+    """
+    rng = np.random.default_rng(seed)
+    l = rng.uniform(4, 40, n)
+    corpus = {
+        'P_DL': rng.uniform(0, 1000, n),
+        'P_LL': rng.uniform(0, 500, n),
+        'l': l,
+        'a': l*rng.uniform(0.05, 0.95, n),
+        'h': rng.uniform(12, 200, n),
+        'b': rng.uniform(10, 48, n),
+        'fc': rng.choice([4000, 5000, 6000, 7000], n).astype(float),
+        'fy': rng.choice([60, 70, 80], n).astype(float),
+        'tie_size': rng.choice(TIE_SIZES, n).astype(float),
+        'col1': rng.uniform(12, 36, n),
+        'col2': rng.uniform(12, 36, n),
+        # Independent demands for rc_beam_design
+        'Mu': rng.uniform(10, 5000, n),
+        'Vu': rng.uniform(0, 500, n),
+    }
+
+    edge = np.flatnonzero(rng.random(n) < edge_fraction)
+    kind = rng.integers(0, 8, len(edge))
+    l, a, h = corpus['l'], corpus['a'], corpus['h']
+    for k in range(8):
+        rows = edge[kind == k]
+        if k == 0:   # Deep beam boundary
+            h[rows] = l[rows]*12/4
+        elif k == 1: # Load next to a support
+            a[rows] = l[rows]*rng.choice([1e-6, 1 - 1e-6], len(rows))
+        elif k == 2: # Just deep enough for the strut angle to exist
+            h[rows] = 10 + rng.uniform(1e-6, 1, len(rows))
+        elif k == 3: # Alpha 1 at 25 degrees
+            a[rows] = (h[rows] - 10)/(12*math.tan(math.radians(25)))
+            l[rows] = np.maximum(l[rows], a[rows]*1.5)
+        elif k == 4:
+            corpus['P_LL'][rows] = 0
+        elif k == 5: # Load at a support
+            a[rows] = rng.choice([0, 1], len(rows))*l[rows]
+        elif k == 6:
+            corpus['b'][rows] = 0
+        elif k == 7:
+            h[rows] = rng.uniform(0, 5, len(rows))
+    return corpus
+
+
+def _nan_if_none(value):
+    return math.nan if value is None else float(value)
+
+
+def reference_outputs(corpus, rows=None):
+    """
+    Runs the scalar reference functions row by row with figures disabled.
+
+    Returns dictionary of function name: dictionary of output arrays, plus a 'Raised' array for
+    each function marking rows where the reference raised an exception (outputs NaN)
+    """
+    rows = np.arange(len(corpus['l'])) if rows is None else np.asarray(rows)
+    out = {name: {key: np.full(len(rows), np.nan) for key in keys + ['Raised']} for name, keys in REFERENCE_KEYS.items()}
+    value = {key: corpus[key][rows].tolist() for key in corpus}
+
+    with figures_disabled():
+        for j in range(len(rows)):
+            P_DL, P_LL, l, a, h, b = (value[key][j] for key in ('P_DL', 'P_LL', 'l', 'a', 'h', 'b'))
+            fc, fy, tie_size, col1, col2 = (value[key][j] for key in ('fc', 'fy', 'tie_size', 'col1', 'col2'))
+            tie_size = int(tie_size)
+
+            for name, call in (('beam_load_analysis', lambda: beam_analysis.beam_load_analysis(P_DL, P_LL, l, a, h, b, col1, col2)),
+                               ('deep_transfer_calc', lambda: deep_transfer_app.deep_transfer_calc(P_DL, P_LL, l, a, h, b, fc, fy, tie_size,
+                                                                                                   col1=col1, col2=col2)),
+                               ('rc_beam_design', lambda: rc_beam_design.rc_beam_design(fc, fy, b, h, value['Mu'][j], value['Vu'][j],
+                                                                                        l, tie_size))):
+                try:
+                    result = call()
+                except (ZeroDivisionError, ValueError, OverflowError):
+                    out[name]['Raised'][j] = 1
+                    continue
+                out[name]['Raised'][j] = 0
+                for key in REFERENCE_KEYS[name]:
+                    if key in result:
+                        out[name][key][j] = _nan_if_none(result[key])
+    return out
+
+
+def candidate_outputs(corpus):
+    """
+    Runs the batch paths over the whole corpus, arranged like reference_outputs
+    """
+    with np.errstate(all='ignore'):
+        loads = beam_analysis.beam_load_analysis_batch(corpus['P_DL'], corpus['P_LL'], corpus['l'], corpus['a'], corpus['h'],
+                                                       corpus['b'], corpus['col1'], corpus['col2'])
+        deep = loads['Deep Beam']
+        stm = deep_transfer_calc_checked(corpus['P_DL'], corpus['P_LL'], corpus['l'], corpus['a'], corpus['h'], corpus['b'],
+                                         corpus['fc'], corpus['fy'], corpus['tie_size'], corpus['col1'], corpus['col2'])
+        flexure = rc_beam_design.rc_beam_design_batch(corpus['fc'], corpus['fy'], corpus['b'], corpus['h'], corpus['Mu'],
+                                                      corpus['Vu'], corpus['tie_size'])
+
+    # beam_load_analysis only returns the outputs of the governing case
+    return {
+        'beam_load_analysis': {'Deep Beam': deep.astype(float), 'Pu': np.where(deep, loads['Pu'], loads['Pu_bb']),
+                               'R1': np.where(deep, loads['R1'], np.nan), 'R2': np.where(deep, loads['R2'], np.nan),
+                               'Vu': np.where(deep, np.nan, loads['Vu']), 'Mu': np.where(deep, np.nan, loads['Mu'])},
+        'deep_transfer_calc': {**{key: stm[key] for key in REFERENCE_KEYS['deep_transfer_calc']},
+                               'Skipped': (stm['Status'] & STM_UNAVAILABLE) > 0},
+        'rc_beam_design': {key: flexure[key] for key in REFERENCE_KEYS['rc_beam_design']},
+    }
+
+
+def compare(reference, candidate, rtol=1e-9, atol=1e-9):
+    """
+    Compares every numeric output where the reference ran. Values match within
+    |ref - cand| <= atol + rtol*|ref|, NaN matches NaN (e.g. no stirrups required).
+    Rows the validation stage rejects on purpose (e.g. h <= 2*cover) are counted separately
+    rather than compared.
+
+    Returns dictionary of function name: dictionary of key: {'Max Abs Error', 'Max Rel Error', 'Mismatches'}
+    """
+    report = {}
+    for name, keys in REFERENCE_KEYS.items():
+        ran = reference[name]['Raised'] == 0
+        if 'Skipped' in candidate[name]:
+            ran &= ~candidate[name]['Skipped']
+        report[name] = {}
+        for key in keys:
+            ref, cand = reference[name][key][ran], candidate[name][key][ran]
+            both_nan = np.isnan(ref) & np.isnan(cand)
+            with np.errstate(all='ignore'):
+                error = np.where(both_nan, 0, np.abs(ref - cand))
+                rel = np.where(both_nan | (ref == 0), 0, error/np.abs(ref))
+            bad = ~(error <= atol + rtol*np.abs(ref)) & ~both_nan
+            report[name][key] = {'Max Abs Error': float(np.nanmax(error, initial=0)), 'Max Rel Error': float(np.nanmax(rel, initial=0)),
+                                 'Mismatches': int(bad.sum())}
+
+    # Rows where deep_transfer_calc raises must be flagged by the validation stage instead
+    raised = reference['deep_transfer_calc']['Raised'] == 1
+    skipped = candidate['deep_transfer_calc']['Skipped']
+    report['deep_transfer_calc']['Unflagged Exceptions'] = {'Mismatches': int((raised & ~skipped).sum())}
+    report['deep_transfer_calc']['Rejected By Validation'] = {'Mismatches': 0, 'Rows': int((~raised & skipped).sum())}
+    return report
+
+
+def _reference_chunk(args):
+    corpus, rows = args
+    return rows, reference_outputs(corpus)
+
+
+def verify(n=1_000_000, seed=0, rtol=1e-9, atol=1e-9, workers=None, chunk_size=20_000):
+    """
+    Generates a corpus of n rows, runs the scalar references on a process pool and the batch paths
+    in one call each, and compares every output.
+
+    Returns dictionary of 'Report' (see compare), 'Mismatches' (total), 'Reference Rate' and
+    'Candidate Rate' (rows/s, all three functions per row) and 'Rows'
+    """
+    corpus = generate_corpus(n, seed)
+
+    start = time.perf_counter()
+    chunks = [np.arange(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+    reference = {name: {key: np.empty(n) for key in keys + ['Raised']} for name, keys in REFERENCE_KEYS.items()}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for rows, partial in executor.map(_reference_chunk, [({key: value[rows] for key, value in corpus.items()}, rows)
+                                                             for rows in chunks]):
+            for name in partial:
+                for key in partial[name]:
+                    reference[name][key][rows] = partial[name][key]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    candidate = candidate_outputs(corpus)
+    candidate_time = time.perf_counter() - start
+
+    report = compare(reference, candidate, rtol, atol)
+    return {'Report': report, 'Mismatches': sum(item['Mismatches'] for keys in report.values() for item in keys.values()),
+            'Reference Rate': n/reference_time, 'Candidate Rate': n/candidate_time, 'Rows': n}
+
+
+def verify_capacity_table(n=100_000, seed=0, table=None, path=None):
+    """
+    Compares quick_capacity_check against deep_transfer_calc_checked on the deep beams of a random
+    corpus. Unlike verify, the table interpolates so errors are reported rather than counted against
+    a tolerance, rows outside the grid ('In Table' False) or rejected by validation are left out.
+
+    table: table from load_capacity_table, built at path (or a temporary file) when None
+
+    Returns dictionary of 'Rows' (compared), 'Out Of Table' (rows clamped to the grid), 'Median Rel Error'
+    and 'Max Rel Error' (dictionaries of key: error) and 'Tie Count Max Difference', 'Tie Count Differences'
+    (fraction of rows with a different tie count)
+    """
+    if table is None:
+        table = build_capacity_table(path) if path else build_capacity_table(os.path.join(tempfile.mkdtemp(), 'capacity_table.npy'))
+    corpus = generate_corpus(n, seed, edge_fraction=0)
+    deep = (corpus['l']*12)/corpus['h'] <= 4
+    args = [corpus[key][deep] for key in ('P_DL', 'P_LL', 'l', 'a', 'h', 'b', 'fc', 'fy', 'tie_size', 'col1', 'col2')]
+
+    quick = quick_capacity_check(table, *args)
+    with np.errstate(all='ignore'):
+        exact = deep_transfer_calc_checked(*args)
+    exact['Vu'] = np.maximum(exact['R1'], exact['R2'])
+
+    compared = quick['In Table'] & ((exact['Status'] & STM_UNAVAILABLE) == STATUS_OK)
+    median, worst = {}, {}
+    for key in ('Phi-Vn (kip)', 'Vu', 'alpha_1', 'alpha_2'):
+        rel = np.abs(quick[key] - exact[key])[compared]/np.abs(exact[key])[compared]
+        median[key], worst[key] = float(np.median(rel)), float(np.max(rel))
+    ties = np.abs(quick['Number of ties'] - exact['Number of ties'])[compared]
+    return {'Rows': int(compared.sum()), 'Out Of Table': int((~quick['In Table']).sum()), 'Median Rel Error': median,
+            'Max Rel Error': worst, 'Tie Count Max Difference': float(ties.max()), 'Tie Count Differences': float(np.mean(ties > 0))}
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    results = verify(n, workers=os.cpu_count())
+    for name, keys in results['Report'].items():
+        for key, item in keys.items():
+            detail = f"rows = {item['Rows']}" if 'Rows' in item else f"max rel error = {item.get('Max Rel Error', 0):.3g}"
+            print(f"{name:20s} {key:22s} mismatches = {item['Mismatches']:<8d} {detail}")
+    print(f"{results['Rows']} rows, reference {results['Reference Rate']:.0f} rows/s, "
+          f"batch {results['Candidate Rate']:.0f} rows/s, total mismatches = {results['Mismatches']}")
+
+    table_results = verify_capacity_table(min(n, 100_000))
+    for key, error in table_results['Max Rel Error'].items():
+        print(f"{'capacity_table':20s} {key:22s} median rel error = {table_results['Median Rel Error'][key]:.3g}  max rel error = {error:.3g}")
+    print(f"{table_results['Rows']} deep beams in table, tie counts differ on {100*table_results['Tie Count Differences']:.2f}% "
+          f"of rows by at most {table_results['Tie Count Max Difference']:.0f}")